@@ -7,6 +7,26 @@ import os
 import argparse
 from .core import DirectoryToMarkdown
 
+SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def _parse_size(value: str) -> int:
+    """解析文件大小，支持 K/M/G 后缀（如 500K、10M、1G）"""
+    text = value.strip().upper()
+    if text.endswith("B"):
+        text = text[:-1]
+    multiplier = 1
+    if text and text[-1] in SIZE_UNITS:
+        multiplier = SIZE_UNITS[text[-1]]
+        text = text[:-1]
+    try:
+        size = int(float(text) * multiplier)
+    except (ValueError, OverflowError):
+        raise argparse.ArgumentTypeError(f"无效的文件大小: {value}") from None
+    if size < 0:
+        raise argparse.ArgumentTypeError(f"文件大小不能为负数: {value}")
+    return size
+
 
 def main():
     """主命令行函数"""
@@ -20,6 +40,7 @@ def main():
   dir-to-md ./project/ --ignore "*.log"      # 忽略日志文件
   dir-to-md ./docs/ --ignore-file .gitignore # 使用.gitignore作为忽略文件
   dir-to-md ./data/ --no-markitdown          # 禁用markitdown转换
+  dir-to-md ./logs/ --max-file-size 10M      # 跳过大于10MB的文件
         """,
     )
 
@@ -28,6 +49,8 @@ def main():
     parser.add_argument("--no-markitdown", action="store_true", help="不使用markitdown转换非文本文件")
     parser.add_argument("--ignore", action="append", default=[], help="忽略模式（支持通配符），可多次使用")
     parser.add_argument("--ignore-file", default=None, help="忽略规则文件路径（如.gitignore）")
+    parser.add_argument("--no-gitignore", action="store_true", help="不读取各级目录中的.gitignore")
+    parser.add_argument("--max-file-size", type=_parse_size, default=None, help="跳过超过该大小的文件，支持K/M/G后缀（如10M）")
     parser.add_argument("--verbose", "-v", action="store_true", help="显示详细输出")
 
     args = parser.parse_args()
@@ -43,12 +66,17 @@ def main():
         output_file = args.output
     else:
         dir_name = args.directory.rstrip("/\\")
-        dir_name = os.path.basename(dir_name) if os.path.basename(dir_name) else dir_name
+        dir_name = os.path.basename(dir_name) or dir_name
         output_file = f"{dir_name.replace('/', '_').replace('\\', '_')}_combined.md"
 
     # 创建处理器实例
     processor = DirectoryToMarkdown(
-        use_markitdown=not args.no_markitdown, ignore_patterns=args.ignore, ignore_file=args.ignore_file, verbose=args.verbose
+        use_markitdown=not args.no_markitdown,
+        ignore_patterns=args.ignore,
+        ignore_file=args.ignore_file,
+        verbose=args.verbose,
+        max_file_size=args.max_file_size,
+        use_gitignore=not args.no_gitignore,
     )
 
     # 处理目录
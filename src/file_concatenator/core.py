@@ -2,11 +2,189 @@
 核心处理逻辑
 """
 
+import codecs
 import fnmatch
+import importlib.util
+import io
 import os
 import re
+import shutil
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import IO, Any, Deque, Dict, FrozenSet, List, Optional, Sequence, TextIO, Tuple, Union
+
+# 通配符字符，不含这些字符的忽略模式按字面量处理
+GLOB_CHARS = "*?[]"
+
+# 预编译的忽略匹配器：(字面量模式集合, 通配符模式合并后的正则)
+IgnoreMatcher = Tuple[FrozenSet[str], Optional[re.Pattern[str]]]
+
+# 预编译的 .gitignore 规则：(所在目录, 正则, 是否取反, 是否只匹配目录, 是否相对所在目录锚定)
+GitignoreRule = Tuple[str, re.Pattern[str], bool, bool, bool]
+
+# 输出文件的写缓冲区大小
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# 文件内容暂存区超过该大小后转存到磁盘临时文件
+CONTENT_SPOOL_SIZE = 8 << 20
+
+# 读取文本文件时依次尝试的编码
+TEXT_ENCODINGS = ["utf-8", "utf-8-sig", "latin-1", "cp1252", "gbk", "gb2312"]
+
+# 超过该大小的文本文件分块流式写入，不整体读入内存
+STREAM_THRESHOLD = 1 << 20
+STREAM_CHUNK_SIZE = 1 << 20
+
+# 文件头的这一部分包含空字节时视为二进制文件
+BINARY_SNIFF_SIZE = 8192
+
+# 各级目录中自动生效的嵌套忽略文件
+NESTED_IGNORE_FILE = ".gitignore"
+
+# 需要使用 markitdown 转换为 Markdown 的文件扩展名
+CONVERT_EXTENSIONS = frozenset(
+    {
+        ".pdf",
+        ".doc",
+        ".docx",
+        ".ppt",
+        ".pptx",
+        ".xls",
+        ".xlsx",
+        ".odt",
+        ".ods",
+        ".odp",
+        ".rtf",
+        ".epub",
+        ".mobi",
+        ".azw3",
+        ".jpg",
+        ".jpeg",
+        ".png",
+        ".gif",
+        ".bmp",
+        ".tiff",
+        ".tif",
+        ".svg",
+        ".webp",
+        ".ico",
+        ".heic",
+        ".heif",
+    }
+)
+
+# 文件扩展名对应的代码高亮语言
+LANGUAGE_MAP = {
+    ".py": "python",
+    ".md": "markdown",
+    ".txt": "text",
+    ".js": "javascript",
+    ".html": "html",
+    ".css": "css",
+    ".json": "json",
+    ".xml": "xml",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".sh": "bash",
+    ".java": "java",
+    ".c": "c",
+    ".cpp": "cpp",
+    ".sql": "sql",
+}
+
+# 文件扩展名对应的类型描述
+FILE_TYPE_MAP = {
+    ".py": "Python脚本",
+    ".md": "Markdown文档",
+    ".txt": "文本文件",
+    ".pdf": "PDF文档",
+    ".doc": "Word文档",
+    ".docx": "Word文档",
+    ".xls": "Excel表格",
+    ".xlsx": "Excel表格",
+    ".jpg": "JPEG图像",
+    ".png": "PNG图像",
+    ".gif": "GIF图像",
+    ".zip": "压缩文件",
+    ".json": "JSON数据",
+    ".html": "HTML网页",
+    ".css": "样式表",
+    ".js": "JavaScript脚本",
+}
+
+# 文件扩展名对应的图标
+FILE_ICON_MAP = {
+    ".py": "🐍",
+    ".md": "📝",
+    ".txt": "📄",
+    ".pdf": "📕",
+    ".doc": "📘",
+    ".docx": "📘",
+    ".xls": "📊",
+    ".xlsx": "📊",
+    ".jpg": "🖼️",
+    ".png": "🖼️",
+    ".gif": "🖼️",
+    ".zip": "🗜️",
+    ".json": "🗂️",
+    ".html": "🌐",
+    ".css": "🎨",
+    ".js": "⚡",
+    ".java": "☕",
+    ".cpp": "⚙️",
+    ".c": "⚙️",
+    ".go": "🐹",
+    ".rs": "🦀",
+}
+
+
+class _BlockWriter:
+    """将零散的小块写入累积在内存中，超过 OUTPUT_BUFFER_SIZE 时整块写入底层文件"""
+
+    def __init__(self, file: TextIO) -> None:
+        self._file = file
+        self._buf = io.StringIO()
+
+    def write(self, text: str) -> None:
+        self._buf.write(text)
+        if self._buf.tell() >= OUTPUT_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """把缓冲区中的内容写入底层文件"""
+        if self._buf.tell():
+            self._file.write(self._buf.getvalue())
+            self._buf.seek(0)
+            self._buf.truncate()
+
+
+class _FileParts:
+    """单个文件的渲染结果：文本片段与写出时才直接复制的大文件按顺序排列"""
+
+    def __init__(self) -> None:
+        self._buf = io.StringIO()
+        self._parts: List[Union[str, Tuple[str, str]]] = []
+
+    def write(self, text: str) -> None:
+        self._buf.write(text)
+
+    def copy_file(self, filepath: str, encoding: str) -> None:
+        """记录一个按 encoding 解码后原样复制的文件，由写出线程直接复制到输出"""
+        self._flush_text()
+        self._parts.append((filepath, encoding))
+
+    def get_parts(self) -> List[Union[str, Tuple[str, str]]]:
+        """返回按顺序排列的文本片段和 (文件路径, 编码)"""
+        self._flush_text()
+        return self._parts
+
+    def _flush_text(self) -> None:
+        if self._buf.tell():
+            self._parts.append(self._buf.getvalue())
+            self._buf = io.StringIO()
 
 
 class DirectoryToMarkdown:
@@ -18,37 +196,85 @@ class DirectoryToMarkdown:
         ignore_patterns: Optional[List[str]] = None,
         ignore_file: Optional[str] = None,
         verbose: bool = False,
+        max_file_size: Optional[int] = None,
+        use_gitignore: bool = True,
     ):
         self.use_markitdown = use_markitdown
         self.ignore_patterns = ignore_patterns or []
         self.ignore_file = ignore_file
         self.verbose = verbose
+        # 超过该字节数的文件不嵌入内容，None 表示不限制
+        self.max_file_size = max_file_size
+        # 是否读取各级目录中的 .gitignore
+        self.use_gitignore = use_gitignore
+
+        # 加载并预编译忽略模式
+        self._base_ignore_patterns = self._load_ignore_patterns()
+        self._ignore_matcher = self._compile_ignore_patterns(self._base_ignore_patterns)
+
+        # 各级目录中的 .gitignore 只作用于所在目录及其子目录，按目录缓存合并后的匹配器
+        self._abs_ignore_file = os.path.abspath(ignore_file) if ignore_file else None
+        self._dir_ignore_cache: Dict[str, Tuple[GitignoreRule, ...]] = {}
+
+        # 遍历时由 DirEntry 获取的文件大小，避免重复 stat
+        self._file_sizes: Dict[str, int] = {}
+
+        # 当前处理的输入目录，由 process() 设置
+        self._abs_input_dir = ""
+        self._input_dir_prefix_len = 0
 
         # 初始化 markitdown
         self.markitdown_instance = None
         self.markitdown_available = False
+        self._markitdown_lock = threading.Lock()
 
         if self.use_markitdown:
             self._init_markitdown()
 
+        # 文件渲染线程池大小
+        self._max_workers = self._get_max_workers()
+
     def _init_markitdown(self):
-        """初始化 markitdown"""
+        """检测 markitdown 是否可用，实际导入推迟到第一次转换时"""
         try:
-            from markitdown import MarkItDown
-
-            self.markitdown_instance = MarkItDown(enable_plugins=False)
-            self.markitdown_available = True
-            if self.verbose:
-                print("✓ markitdown已成功加载")
-        except ImportError:
+            self.markitdown_available = importlib.util.find_spec("markitdown") is not None
+        except (ImportError, ValueError) as e:
             if self.verbose:
+                print(f"⚠ 检测markitdown时出错: {str(e)}")
+            self.markitdown_available = False
+            return
+
+        if self.verbose:
+            if self.markitdown_available:
+                print("✓ 检测到markitdown，将在首次转换时加载")
+            else:
                 print("⚠ markitdown未安装，PDF等文件将无法自动转换")
                 print("  使用: pip install markitdown 进行安装")
-            self.markitdown_available = False
-        except Exception as e:
-            if self.verbose:
-                print(f"⚠ 加载markitdown时出错: {str(e)}")
-            self.markitdown_available = False
+
+    def _get_markitdown(self) -> Any:
+        """获取 markitdown 实例，首次调用时才导入（其依赖较重）
+
+        导入或初始化失败时将 markitdown_available 置为 False 并返回 None，之后不再重试。
+        """
+        if self.markitdown_instance is None and self.markitdown_available:
+            with self._markitdown_lock:
+                if self.markitdown_instance is None and self.markitdown_available:
+                    try:
+                        from markitdown import MarkItDown
+
+                        self.markitdown_instance = MarkItDown(enable_plugins=False)
+                        if self.verbose:
+                            print("✓ markitdown已成功加载")
+                    except ImportError:
+                        if self.verbose:
+                            print("⚠ markitdown未安装，PDF等文件将无法自动转换")
+                            print("  使用: pip install markitdown 进行安装")
+                        self.markitdown_available = False
+                    except Exception as e:
+                        if self.verbose:
+                            print(f"⚠ 加载markitdown时出错: {str(e)}")
+                        self.markitdown_available = False
+        return self.markitdown_instance
 
     def process(self, input_dir: str, output_file: str) -> bool:
         """处理目录并生成Markdown文件"""
@@ -58,29 +284,42 @@ class DirectoryToMarkdown:
             print(f"✗ 错误: 目录 '{input_dir}' 不存在")
             return False
 
-        # 加载忽略模式
-        all_ignore_patterns = self._load_ignore_patterns()
-        all_ignore_patterns.append(output_file)
+        # 输入目录的绝对路径只计算一次；遍历得到的路径都以 input_dir 开头，截掉前缀即为相对路径
+        self._abs_input_dir = os.path.abspath(input_dir)
+        self._input_dir_prefix_len = len(input_dir) if input_dir.endswith(os.sep) else len(input_dir) + 1
+
+        # 输出文件也需要忽略，重新编译忽略模式
+        self._ignore_matcher = self._compile_ignore_patterns(self._base_ignore_patterns + [output_file])
+        self._dir_ignore_cache.clear()
 
         print(f"📁 处理目录: {input_dir}")
         print(f"📄 输出文件: {output_file}")
 
         # 统计信息
         stats = self._init_stats()
+        self._file_sizes.clear()
 
         try:
-            with open(output_file, "w", encoding="utf-8") as md_file:
-                # 写入头部信息
-                self._write_header(md_file, input_dir)
+            # 先打开输出文件，无法写入时尽早失败；内容按块写入，不在内存中积累整个文档
+            with open(output_file, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE) as md_file:
+                buf = _BlockWriter(md_file)
 
-                # 生成目录树
-                self._write_directory_tree(md_file, input_dir, all_ignore_patterns)
+                # 目录树直接写入输出文件，文件内容先暂存，待目录树写完后再复制到其后
+                with tempfile.SpooledTemporaryFile(
+                    max_size=CONTENT_SPOOL_SIZE, mode="w+", encoding="utf-8", newline=""
+                ) as content_buf:
+                    # 写入头部信息
+                    self._write_header(buf, input_dir)
 
-                # 处理所有文件
-                self._process_files(md_file, input_dir, all_ignore_patterns, stats)
+                    # 单次遍历，同时生成目录树和所有文件内容
+                    self._write_directory_tree(buf, content_buf, input_dir, stats)
 
-                # 写入统计信息
-                self._write_statistics(md_file, stats)
+                    # 写入统计信息
+                    self._write_statistics(content_buf, stats)
+
+                    buf.flush()
+                    content_buf.seek(0)
+                    shutil.copyfileobj(content_buf, md_file, OUTPUT_BUFFER_SIZE)
 
             # 打印统计信息
             self._print_statistics(stats, output_file)
@@ -127,6 +366,107 @@ class DirectoryToMarkdown:
                 print(f"✗ 读取忽略文件时出错: {str(e)}")
         return patterns
 
+    def _compile_ignore_patterns(self, patterns: List[str]) -> IgnoreMatcher:
+        """预编译忽略模式：字面量放入集合，通配符模式合并为单个正则表达式"""
+        if os.name == "nt":
+            # Windows 下 fnmatch 大小写不敏感，全部交给正则处理
+            literals: List[str] = []
+            globs = patterns
+        else:
+            literals = [p for p in patterns if not any(c in p for c in GLOB_CHARS)]
+            globs = [p for p in patterns if any(c in p for c in GLOB_CHARS)]
+
+        literal_set = frozenset(literals)
+        if not globs:
+            return literal_set, None
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        return literal_set, re.compile("|".join(f"(?:{fnmatch.translate(os.path.normcase(p))})" for p in globs), flags)
+
+    def _get_dir_gitignore_rules(
+        self, root: str, parent_root: Optional[str] = None, has_gitignore: bool = False
+    ) -> Tuple[GitignoreRule, ...]:
+        """获取作用于目录 root 下各条目的 .gitignore 规则
+
+        在父目录规则之后追加 root 中 .gitignore 的规则，结果按目录缓存。
+        has_gitignore 由调用方根据已扫描的目录条目给出，避免额外的 stat。
+        """
+        rules = self._dir_ignore_cache.get(root)
+        if rules is not None:
+            return rules
+
+        rules = self._dir_ignore_cache.get(parent_root, ()) if parent_root is not None else ()
+
+        if self.use_gitignore and has_gitignore:
+            nested_file = os.path.join(root, NESTED_IGNORE_FILE)
+            # 已通过 --ignore-file 加载的文件不重复合并
+            if os.path.abspath(nested_file) != self._abs_ignore_file:
+                own_rules = []
+                for line in self._load_ignore_file(nested_file):
+                    rule = self._compile_gitignore_rule(root, line)
+                    if rule is not None:
+                        own_rules.append(rule)
+                rules = rules + tuple(own_rules)
+
+        self._dir_ignore_cache[root] = rules
+        return rules
+
+    def _compile_gitignore_rule(self, root: str, line: str) -> Optional[GitignoreRule]:
+        """按 .gitignore 的基本规则编译一行模式
+
+        开头的 ! 表示取反；结尾的 / 表示只匹配目录；开头或中间含 / 时相对 root 锚定，
+        否则匹配任意层级的条目名称。
+        """
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line[:2] in ("\\!", "\\#"):
+            # \! 和 \# 表示字面量
+            line = line[1:]
+
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line
+        line = line.lstrip("/")
+        if not line:
+            return None
+
+        regex_parts = []
+        segments = line.split("/")
+        for i, segment in enumerate(segments):
+            is_last = i == len(segments) - 1
+            if segment == "**":
+                regex_parts.append(".*" if is_last else "(?:.*/)?")
+            else:
+                regex_parts.append(self._translate_gitignore_segment(segment) + ("" if is_last else "/"))
+
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        return root, re.compile("".join(regex_parts), flags), negate, dir_only, anchored
+
+    def _translate_gitignore_segment(self, segment: str) -> str:
+        """将路径中的一段通配符模式转换为正则，* 和 ? 不匹配 /"""
+        regex_parts = []
+        i = 0
+        while i < len(segment):
+            c = segment[i]
+            i += 1
+            if c == "*":
+                regex_parts.append("[^/]*")
+            elif c == "?":
+                regex_parts.append("[^/]")
+            elif c == "[" and "]" in segment[i + 1 :]:
+                end = segment.index("]", i + 1)
+                chars = segment[i:end].replace("\\", "\\\\")
+                if chars.startswith("!"):
+                    chars = "^" + chars[1:]
+                regex_parts.append(f"[{chars}]")
+                i = end + 1
+            elif c == "\\" and i < len(segment):
+                regex_parts.append(re.escape(segment[i]))
+                i += 1
+            else:
+                regex_parts.append(re.escape(c))
+        return "".join(regex_parts)
+
     def _init_stats(self) -> Dict[str, Any]:
         """初始化统计信息"""
         return {
@@ -136,381 +476,491 @@ class DirectoryToMarkdown:
             "converted_files": 0,
             "ignored_paths": 0,
             "failed_files": 0,
+            "skipped_large": 0,
             "start_time": datetime.now(),
         }
 
-    def _write_header(self, md_file, input_dir: str):
+    def _write_header(self, buf, input_dir: str):
         """写入文件头部信息"""
-        dir_name = os.path.basename(input_dir) if os.path.basename(input_dir) else input_dir
-        md_file.write(f"# 📁 目录: {dir_name}\n\n")
-        md_file.write(f"**原始路径**: `{os.path.abspath(input_dir)}`  \n")
-        md_file.write(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  \n\n")
+        dir_name = os.path.basename(input_dir) or input_dir
+        buf.write(f"# 📁 目录: {dir_name}\n\n")
+        buf.write(f"**原始路径**: `{self._abs_input_dir}`  \n")
+        buf.write(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}  \n\n")
 
-    def _write_directory_tree(self, md_file, input_dir: str, ignore_patterns: List[str]):
-        """写入目录树"""
-        md_file.write("## 📊 目录结构\n\n")
-        md_file.write("```\n")
+    def _write_directory_tree(self, buf: _BlockWriter, content_buf: IO[str], input_dir: str, stats: dict) -> None:
+        """写入目录树，同时将文件内容写入 content_buf"""
+        buf.write("## 📊 目录结构\n\n")
+        buf.write("```\n")
 
-        tree_lines = self._generate_directory_tree(input_dir, ignore_patterns)
-        md_file.write("\n".join(tree_lines))
+        tree_line_count = self._walk_and_render(buf, content_buf, input_dir, stats)
 
-        md_file.write("\n```\n\n")
-        md_file.write("---\n\n")
+        # 与逐行拼接后的格式一致：目录树为空时保留一个空行
+        buf.write("```\n\n" if tree_line_count else "\n```\n\n")
+        buf.write("---\n\n")
 
-    def _generate_directory_tree(
-        self, root_dir: str, ignore_patterns: List[str], prefix: str = "", current_rel_path: str = ""
-    ) -> List[str]:
-        """生成目录树"""
-        items = []
-
-        try:
-            entries = sorted(os.listdir(root_dir))
-        except (PermissionError, OSError) as e:
-            return [f"{prefix}└── (无法访问: {str(e)})"]
+    def _should_ignore(
+        self,
+        path: str,
+        relative_path: str,
+        parts: Optional[Sequence[str]] = None,
+        root: Optional[str] = None,
+        is_dir: bool = False,
+    ) -> bool:
+        """检查路径是否应该被忽略
+
+        parts 为需要逐段匹配的路径片段，默认取 path 的全部片段；
+        父目录已检查过时只需传入当前条目名称。
+        root 为条目所在目录，指定时还会应用该目录缓存的 .gitignore 规则。
+        """
+        if parts is None:
+            parts = path.split(os.sep)
+
+        literals, ignore_re = self._ignore_matcher
+
+        # 先用集合查找字面量模式，避免正则开销
+        if literals and (path in literals or relative_path in literals or not literals.isdisjoint(parts)):
+            return True
 
-        for i, entry in enumerate(entries):
-            path = os.path.join(root_dir, entry)
-            rel_entry_path = os.path.join(current_rel_path, entry) if current_rel_path else entry
+        if ignore_re is not None:
+            if ignore_re.match(path) or ignore_re.match(relative_path):
+                return True
+            if any(ignore_re.match(part) for part in parts):
+                return True
 
-            # 检查是否应该忽略
-            if self._should_ignore(path, rel_entry_path, ignore_patterns):
+        if root is None:
+            return False
+        return self._match_gitignore_rules(self._dir_ignore_cache.get(root, ()), path, parts[-1], is_dir)
+
+    def _match_gitignore_rules(self, rules: Sequence[GitignoreRule], path: str, name: str, is_dir: bool) -> bool:
+        """按顺序应用 .gitignore 规则，最后一条匹配的规则决定是否忽略"""
+        ignored = False
+        for rule_root, pattern, negate, dir_only, anchored in rules:
+            # 只有能改变当前结果的规则才需要匹配
+            if negate != ignored or (dir_only and not is_dir):
                 continue
+            if anchored:
+                target = path[len(rule_root) + 1 :]
+                if os.sep != "/":
+                    target = target.replace(os.sep, "/")
+            else:
+                target = name
+            if pattern.fullmatch(target):
+                ignored = not negate
+        return ignored
+
+    def _walk_and_render(self, tree: _BlockWriter, content_buf: IO[str], input_dir: str, stats: dict) -> int:
+        """单次遍历整个目录：将目录树各行写入 tree，同时将文件内容按遍历顺序写入 content_buf，返回目录树行数
+
+        文件内容在线程池中并行渲染。
+        """
+        # 根目录本身被忽略时，其下所有条目都被忽略
+        if self._should_ignore(input_dir, "."):
+            stats["ignored_paths"] += 1
+            return 0
 
-            is_last = i == len(entries) - 1
+        # 按遍历顺序排队的目录标题和渲染任务
+        pending: Deque[Union[str, Future]] = deque()
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            tree_line_count = self._render_dir(input_dir, [], "", executor, pending, tree, content_buf, stats)
+            self._flush_pending(content_buf, pending, stats, 0)
+        return tree_line_count
 
+    def _render_dir(
+        self,
+        dir_path: str,
+        path_names: List[str],
+        prefix: str,
+        executor: ThreadPoolExecutor,
+        pending: Deque[Union[str, Future]],
+        tree: _BlockWriter,
+        content_buf: IO[str],
+        stats: dict,
+    ) -> int:
+        """处理单个目录：提交该目录下文件的渲染任务并递归子目录，将目录树行写入 tree，返回写入的行数
+
+        path_names 为相对输入目录的各级目录名（根目录为空列表）。
+        文件内容先于子目录内容输出，与 os.walk 自顶向下的顺序一致。
+        """
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            tree.write(f"{prefix}└── (无法访问: {str(e)})\n")
+            return 1
+
+        # 合并当前目录中的 .gitignore
+        has_gitignore = any(entry.name == NESTED_IGNORE_FILE and entry.is_file() for entry in entries)
+        self._get_dir_gitignore_rules(dir_path, os.path.dirname(dir_path) if path_names else None, has_gitignore)
+
+        stats["total_dirs"] += 1
+
+        # 标题前缀每个目录只计算一次，供该目录下所有文件复用
+        depth = len(path_names)
+        dir_heading_prefix = "#" * min(depth + 1, 6)
+        file_heading_prefix = "#" * min(depth + 2, 6)
+
+        # 写入目录标题
+        if path_names:
+            path_str = " / ".join(path_names)
+            pending.append(f"{dir_heading_prefix} 📂 目录: {path_str}\n\n")
+
+        # 过滤条目（当前目录已检查过，只需匹配条目名称），同时提交文件渲染任务
+        kept = []
+        for i, entry in enumerate(entries):
+            name = entry.name
+            rel_entry_path = entry.path[self._input_dir_prefix_len :]
             try:
-                if os.path.isdir(path):
-                    items.append(f"{prefix}{'└── ' if is_last else '├── '}{entry}/")
-                    # 递归处理子目录
-                    extension = self._generate_directory_tree(
-                        path, ignore_patterns, prefix + ("    " if is_last else "│   "), rel_entry_path
-                    )
-                    items.extend(extension)
-                else:
-                    items.append(f"{prefix}{'└── ' if is_last else '├── '}{entry}")
-            except Exception as e:
-                items.append(f"{prefix}{'└── ' if is_last else '├── '}{entry} (错误: {str(e)})")
-
-        return items
-
-    def _should_ignore(self, path: str, relative_path: str, ignore_patterns: List[str]) -> bool:
-        """检查路径是否应该被忽略"""
-        for pattern in ignore_patterns:
-            if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(relative_path, pattern):
-                return True
-            for part in path.split(os.sep):
-                if fnmatch.fnmatch(part, pattern):
-                    return True
-        return False
-
-    def _process_files(self, md_file, input_dir: str, ignore_patterns: List[str], stats: dict):
-        """处理所有文件"""
-        current_paths = []
-
-        for root, dirs, files in os.walk(input_dir):
-            rel_path = os.path.relpath(root, input_dir)
-
-            # 过滤目录
-            original_dirs_count = len(dirs)
-            dirs[:] = [
-                d
-                for d in dirs
-                if not self._should_ignore(
-                    os.path.join(root, d), os.path.join(rel_path, d) if rel_path != "." else d, ignore_patterns
-                )
-            ]
-            stats["ignored_paths"] += original_dirs_count - len(dirs)
-
-            # 排序
-            dirs.sort()
-            files.sort()
-
-            # 计算深度
-            depth = 0 if rel_path == "." else len(rel_path.split(os.sep))
-
-            # 更新路径栈
-            while current_paths and len(current_paths) >= depth:
-                current_paths.pop()
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if self._should_ignore(entry.path, rel_entry_path, (name,), dir_path, is_dir):
+                stats["ignored_paths"] += 1
+                continue
 
-            dir_name = os.path.basename(root) if os.path.basename(root) else root
-            if rel_path != ".":
-                current_paths.append(dir_name)
+            kept.append((i, entry, is_dir))
+            if is_dir:
+                continue
 
-            # 检查目录是否被忽略
-            if self._should_ignore(root, rel_path, ignore_patterns):
-                stats["ignored_paths"] += 1
+            try:
+                self._file_sizes[entry.path] = entry.stat().st_size
+            except OSError:
+                pass
+            pending.append(executor.submit(self._render_file, dir_path, name, rel_entry_path, file_heading_prefix))
+            self._flush_pending(content_buf, pending, stats, self._max_workers * 4)
+
+        # 生成目录树并递归子目录；与原实现一致，按过滤前的条目判断最后一项
+        last_index = len(entries) - 1
+        tree_line_count = len(kept)
+        for i, entry, is_dir in kept:
+            is_last = i == last_index
+            connector = "└── " if is_last else "├── "
+            if not is_dir:
+                tree.write(f"{prefix}{connector}{entry.name}\n")
                 continue
 
-            stats["total_dirs"] += 1
-
-            # 写入目录标题
-            if rel_path != ".":
-                heading_level = min(depth + 1, 6)
-                heading_prefix = "#" * heading_level
-                path_str = " / ".join(current_paths)
-                md_file.write(f"{heading_prefix} 📂 目录: {path_str}\n\n")
-
-            # 过滤文件
-            original_files_count = len(files)
-            files = [
-                f
-                for f in files
-                if not self._should_ignore(
-                    os.path.join(root, f), os.path.join(rel_path, f) if rel_path != "." else f, ignore_patterns
+            tree.write(f"{prefix}{connector}{entry.name}/\n")
+            # 与 os.walk 默认行为一致，不进入符号链接目录
+            if not entry.is_symlink():
+                tree_line_count += self._render_dir(
+                    entry.path,
+                    path_names + [entry.name],
+                    prefix + ("    " if is_last else "│   "),
+                    executor,
+                    pending,
+                    tree,
+                    content_buf,
+                    stats,
                 )
-            ]
-            stats["ignored_paths"] += original_files_count - len(files)
+        return tree_line_count
+
+    def _get_max_workers(self) -> int:
+        """获取线程池大小：markitdown 转换偏重 CPU，纯文本读取偏重 IO"""
+        cpu_count = os.cpu_count() or 1
+        if self.markitdown_available:
+            return cpu_count
+        return min(32, cpu_count + 4)
+
+    def _flush_pending(self, content_buf: IO[str], pending: Deque[Union[str, Future]], stats: dict, max_pending: int) -> None:
+        """按顺序写出队首已完成的内容，并合并各文件的统计信息"""
+        while pending:
+            item = pending[0]
+            if isinstance(item, Future) and len(pending) <= max_pending and not item.done():
+                break
+            pending.popleft()
+            if isinstance(item, str):
+                content_buf.write(item)
+                continue
+            parts, file_stats = item.result()
+            for part in parts:
+                if isinstance(part, str):
+                    content_buf.write(part)
+                else:
+                    self._copy_text_file(content_buf, *part)
+            for key, value in file_stats.items():
+                stats[key] += value
 
-            # 处理文件
-            for filename in files:
-                self._process_file(md_file, root, filename, input_dir, depth, stats)
+    def _render_file(
+        self, root: str, filename: str, rel_file_path: str, heading_prefix: str
+    ) -> Tuple[List[Union[str, Tuple[str, str]]], Dict[str, int]]:
+        """渲染单个文件，返回 Markdown 内容片段及该文件的统计信息
 
-    def _process_file(self, md_file, root: str, filename: str, input_dir: str, depth: int, stats: dict):
-        """处理单个文件"""
+        大文本文件的内容不读入内存，以 (文件路径, 编码) 的形式留给写出线程直接复制。
+        """
         filepath = os.path.join(root, filename)
-        rel_file_path = os.path.relpath(filepath, input_dir)
 
-        stats["total_files"] += 1
+        buf = _FileParts()
+        stats = {"total_files": 1, "text_files": 0, "converted_files": 0, "failed_files": 0, "skipped_large": 0}
 
         # 写入文件标题
-        file_heading_level = min(depth + 2, 6)
-        file_heading_prefix = "#" * file_heading_level
         file_ext = os.path.splitext(filename)[1].lower()
 
-        md_file.write(f"{file_heading_prefix} {self._get_file_icon(file_ext)} 文件: {filename}\n\n")
-        md_file.write(f"**路径**: `{rel_file_path}`  \n")
+        buf.write(f"{heading_prefix} {self._get_file_icon(file_ext)} 文件: {filename}\n\n")
+        buf.write(f"**路径**: `{rel_file_path}`  \n")
 
         try:
             file_size = self._get_file_size(filepath)
-            md_file.write(f"**大小**: {file_size}  \n")
+            buf.write(f"**大小**: {file_size}  \n")
         except Exception:
-            md_file.write("**大小**: 未知  \n")
+            buf.write("**大小**: 未知  \n")
 
-        md_file.write(f"**类型**: {self._get_file_type_description(file_ext)}\n\n")
+        buf.write(f"**类型**: {self._get_file_type_description(file_ext)}\n\n")
 
-        # 处理文件内容
-        self._process_file_content(md_file, filepath, filename, stats)
-
-        md_file.write("---\n\n")
+        # 处理文件内容，过大的文件不打开
+        file_size_bytes = self._file_sizes.get(filepath)
+        if self.max_file_size is not None and file_size_bytes is not None and file_size_bytes > self.max_file_size:
+            buf.write("*(文件过大，已跳过)*\n\n")
+            stats["skipped_large"] += 1
+        else:
+            self._process_file_content(buf, filepath, file_ext, stats)
 
-    def _process_file_content(self, md_file, filepath: str, filename: str, stats: dict):
-        """处理文件内容"""
-        ext = os.path.splitext(filename)[1].lower()
+        buf.write("---\n\n")
+        return buf.get_parts(), stats
 
+    def _process_file_content(self, buf, filepath: str, ext: str, stats: dict):
+        """处理文件内容，ext 为已转换为小写的文件扩展名"""
         # 判断是否需要转换
-        should_convert = self._should_convert_to_markdown(ext) and self.markitdown_available
+        convertible = self._should_convert_to_markdown(ext)
+        # markitdown 导入失败时 _get_markitdown 返回 None，按未安装处理
+        should_convert = convertible and self.markitdown_available and self._get_markitdown() is not None
 
         if should_convert:
             stats["converted_files"] += 1
-            self._convert_with_markitdown(md_file, filepath, stats)
+            self._convert_with_markitdown(buf, filepath, stats)
         else:
-            # 尝试读取文本文件
-            content = self._read_text_file(filepath)
-            if content is not None:
+            # 尝试读取文本文件，大文件分块流式写入
+            if self._file_sizes.get(filepath, 0) > STREAM_THRESHOLD:
+                is_text = self._stream_text_file(buf, filepath, ext)
+            else:
+                content = self._read_text_file(filepath)
+                is_text = content is not None
+                if content is not None:
+                    self._write_text_content(buf, content, ext)
+
+            if is_text:
                 stats["text_files"] += 1
-                self._write_text_content(md_file, content, filename)
             else:
-                if self.markitdown_available and self._should_convert_to_markdown(ext):
-                    md_file.write("*(二进制文件，需要markitdown进行转换但转换失败)*\n\n")
+                if self.markitdown_available and convertible:
+                    buf.write("*(二进制文件，需要markitdown进行转换但转换失败)*\n\n")
                 else:
-                    md_file.write("*(二进制文件，内容无法直接显示)*\n\n")
+                    buf.write("*(二进制文件，内容无法直接显示)*\n\n")
                 stats["failed_files"] += 1
 
-    def _convert_with_markitdown(self, md_file, filepath: str, stats: dict):
+    def _convert_with_markitdown(self, buf, filepath: str, stats: dict):
         """使用markitdown转换文件"""
         try:
-            result = self.markitdown_instance.convert(filepath)
+            result = self._get_markitdown().convert(filepath)
             content = result.text_content
 
             if content:
-                md_file.write("*(使用markitdown转换后的内容)*\n\n")
+                buf.write("*(使用markitdown转换后的内容)*\n\n")
                 separator = self._get_safe_separator(content)
-                md_file.write(f"{separator}markdown\n")
-                md_file.write(content)
+                buf.write(f"{separator}markdown\n")
+                buf.write(content)
                 if not content.endswith("\n"):
-                    md_file.write("\n")
-                md_file.write(f"{separator}\n\n")
+                    buf.write("\n")
+                buf.write(f"{separator}\n\n")
             else:
-                md_file.write("*(转换成功但返回空内容)*\n\n")
+                buf.write("*(转换成功但返回空内容)*\n\n")
                 stats["failed_files"] += 1
         except Exception as e:
-            md_file.write(f"*(使用markitdown转换失败: {str(e)})*\n\n")
+            buf.write(f"*(使用markitdown转换失败: {str(e)})*\n\n")
             stats["failed_files"] += 1
 
-    def _write_text_content(self, md_file, content: str, filename: str):
+    def _write_text_content(self, buf, content: str, ext: str):
         """写入文本内容"""
-        language = self._get_language_from_extension(filename)
+        language = self._get_language_from_extension(ext)
         separator = self._get_safe_separator(content)
-        md_file.write(f"{separator}{language}\n")
-        md_file.write(content)
+        buf.write(f"{separator}{language}\n")
+        buf.write(content)
         if not content.endswith("\n"):
-            md_file.write("\n")
-        md_file.write(f"{separator}\n\n")
+            buf.write("\n")
+        buf.write(f"{separator}\n\n")
+
+    def _stream_text_file(self, buf: _FileParts, filepath: str, ext: str) -> bool:
+        """写入大文本文件的代码块，文件内容留给写出线程直接复制，无法按文本读取时返回 False"""
+        try:
+            scanned = self._scan_text_file(filepath)
+        except Exception:
+            return False
+        if scanned is None:
+            return False
+
+        encoding, max_backticks, ends_with_newline = scanned
+        language = self._get_language_from_extension(ext)
+        separator = "`" * max(3, max_backticks + 1)
+        buf.write(f"{separator}{language}\n")
+        buf.copy_file(filepath, encoding)
+        if not ends_with_newline:
+            buf.write("\n")
+        buf.write(f"{separator}\n\n")
+        return True
+
+    def _scan_text_file(self, filepath: str) -> Optional[Tuple[str, int, bool]]:
+        """分块读取文件，返回 (可用的编码, 连续反引号的最大数量, 是否以换行结尾)
+
+        二进制文件返回 None。通常只读取一遍，某个编码中途解码失败时才从头换下一个编码。
+        """
+        with open(filepath, "rb") as f:
+            head = f.read(STREAM_CHUNK_SIZE)
+            if self._looks_binary(head):
+                return None
+
+            for encoding in self._order_encodings(head, TEXT_ENCODINGS):
+                try:
+                    decoder = codecs.getincrementaldecoder(encoding)()
+                except LookupError:
+                    continue
+
+                f.seek(len(head))
+                chunk = head
+                max_backticks = 0
+                carry = 0
+                last_char = ""
+                try:
+                    while True:
+                        final = not chunk
+                        text = decoder.decode(chunk, final=final)
+                        if text:
+                            longest, carry = self._find_longest_backtick_sequence_in_chunk(text, carry)
+                            max_backticks = max(max_backticks, longest)
+                            last_char = text[-1]
+                        if final:
+                            break
+                        chunk = f.read(STREAM_CHUNK_SIZE)
+                except UnicodeDecodeError:
+                    continue
+                # 文本模式读取时 \r 会转换为 \n
+                return encoding, max_backticks, last_char in ("\n", "\r")
+        return None
+
+    def _copy_text_file(self, buf: IO[str], filepath: str, encoding: str) -> None:
+        """按文本模式分块复制文件内容到输出，换行符与 _read_text_file 一致统一为 \n"""
+        with open(filepath, "r", encoding=encoding, errors="replace") as f:
+            shutil.copyfileobj(f, buf, STREAM_CHUNK_SIZE)
 
     def _get_safe_separator(self, content: str) -> str:
         """获取安全的代码块分隔符"""
+        # 分隔符比内容中最长的连续反引号更长，因此不会与任何一行相同
         max_backticks = self._find_longest_backtick_sequence(content)
-        backtick_count = max(3, max_backticks + 1)
-        separator = "`" * backtick_count
-
-        # 确保分隔符唯一
-        lines = content.split("\n")
-        while any(line.strip() == separator for line in lines) and backtick_count < 20:
-            backtick_count += 1
-            separator = "`" * backtick_count
-
-        return separator
+        return "`" * max(3, max_backticks + 1)
 
     def _find_longest_backtick_sequence(self, content: str) -> int:
-        """找出内容中连续反引号的最大数量"""
-        if not content:
+        """找出内容中连续反引号的最大数量
+
+        长度为 k 的连续反引号存在当且仅当 k 不超过最大数量，
+        因此用子串查找做倍增加二分，不需要收集所有匹配。
+        """
+        if "`" not in content:
             return 0
-        matches = re.findall(r"(`+)", content)
-        return max([len(match) for match in matches], default=0)
+
+        # 倍增找到上界：low 存在，high 不存在
+        low, high = 1, 2
+        while "`" * high in content:
+            low, high = high, high * 2
+
+        # 二分查找最大数量
+        while high - low > 1:
+            mid = (low + high) // 2
+            if "`" * mid in content:
+                low = mid
+            else:
+                high = mid
+        return low
+
+    def _find_longest_backtick_sequence_in_chunk(self, chunk: str, carry: int) -> Tuple[int, int]:
+        """在分块内容中找出连续反引号的最大数量
+
+        carry 为上一块末尾的连续反引号数量，返回 (最大数量, 本块末尾的连续反引号数量)。
+        """
+        stripped = chunk.lstrip("`")
+        leading = len(chunk) - len(stripped)
+        if not stripped:
+            return carry + leading, carry + leading
+        trailing = len(stripped) - len(stripped.rstrip("`"))
+        return max(carry + leading, self._find_longest_backtick_sequence(stripped)), trailing
 
     def _should_convert_to_markdown(self, ext: str) -> bool:
         """判断文件扩展名是否需要转换为Markdown"""
-        convert_extensions = {
-            ".pdf",
-            ".doc",
-            ".docx",
-            ".ppt",
-            ".pptx",
-            ".xls",
-            ".xlsx",
-            ".odt",
-            ".ods",
-            ".odp",
-            ".rtf",
-            ".epub",
-            ".mobi",
-            ".azw3",
-            ".jpg",
-            ".jpeg",
-            ".png",
-            ".gif",
-            ".bmp",
-            ".tiff",
-            ".tif",
-            ".svg",
-            ".webp",
-            ".ico",
-            ".heic",
-            ".heif",
-        }
-        return ext in convert_extensions
+        return ext in CONVERT_EXTENSIONS
 
     def _read_text_file(self, filepath: str, encodings=None) -> Optional[str]:
-        """尝试使用多种编码读取文本文件"""
+        """尝试使用多种编码读取文本文件
+
+        文件只读取一次，之后在内存中依次尝试各编码解码。
+        """
         if encodings is None:
-            encodings = ["utf-8", "utf-8-sig", "latin-1", "cp1252", "gbk", "gb2312"]
+            encodings = TEXT_ENCODINGS
 
-        for encoding in encodings:
+        try:
+            with open(filepath, "rb") as f:
+                data = f.read()
+        except Exception:
+            return None
+
+        # 二进制文件直接跳过，避免 latin-1 等编码"解码成功"产生乱码
+        if self._looks_binary(data):
+            return None
+
+        for encoding in self._order_encodings(data, encodings):
             try:
-                with open(filepath, "r", encoding=encoding) as f:
-                    return f.read()
+                content = data.decode(encoding)
             except (UnicodeDecodeError, LookupError):
                 continue
-            except Exception:
-                break
+            # 与文本模式读取一致，统一换行符
+            return content.replace("\r\n", "\n").replace("\r", "\n")
         return None
 
-    def _get_language_from_extension(self, filename: str) -> str:
+    def _looks_binary(self, head: bytes) -> bool:
+        """文件头包含空字节时判定为二进制文件"""
+        return b"\x00" in head[:BINARY_SNIFF_SIZE]
+
+    def _order_encodings(self, head: bytes, encodings: List[str]) -> List[str]:
+        """带 UTF-8 BOM 的内容优先使用 utf-8-sig，避免 BOM 出现在输出中"""
+        if head.startswith(codecs.BOM_UTF8) and "utf-8-sig" in encodings:
+            return ["utf-8-sig"] + [e for e in encodings if e != "utf-8-sig"]
+        return encodings
+
+    def _get_language_from_extension(self, ext: str) -> str:
         """根据文件扩展名获取语言"""
-        ext_map = {
-            ".py": "python",
-            ".md": "markdown",
-            ".txt": "text",
-            ".js": "javascript",
-            ".html": "html",
-            ".css": "css",
-            ".json": "json",
-            ".xml": "xml",
-            ".yaml": "yaml",
-            ".yml": "yaml",
-            ".sh": "bash",
-            ".java": "java",
-            ".c": "c",
-            ".cpp": "cpp",
-            ".sql": "sql",
-        }
-        return ext_map.get(os.path.splitext(filename)[1].lower(), "")
+        return LANGUAGE_MAP.get(ext, "")
 
     def _get_file_size(self, filepath: str) -> str:
         """获取文件大小的人类可读格式"""
         try:
-            size = os.path.getsize(filepath)
+            size = self._file_sizes.get(filepath)
+            if size is None:
+                size = os.path.getsize(filepath)
+            value: float = size
             for unit in ["B", "KB", "MB", "GB"]:
-                if size < 1024.0:
-                    return f"{size:.1f} {unit}"
-                size /= 1024.0
-            return f"{size:.1f} TB"
+                if value < 1024.0:
+                    return f"{value:.1f} {unit}"
+                value /= 1024.0
+            return f"{value:.1f} TB"
         except Exception:
             return "未知"
 
     def _get_file_type_description(self, ext: str) -> str:
         """获取文件类型描述"""
-        type_map = {
-            ".py": "Python脚本",
-            ".md": "Markdown文档",
-            ".txt": "文本文件",
-            ".pdf": "PDF文档",
-            ".doc": "Word文档",
-            ".docx": "Word文档",
-            ".xls": "Excel表格",
-            ".xlsx": "Excel表格",
-            ".jpg": "JPEG图像",
-            ".png": "PNG图像",
-            ".gif": "GIF图像",
-            ".zip": "压缩文件",
-            ".json": "JSON数据",
-            ".html": "HTML网页",
-            ".css": "样式表",
-            ".js": "JavaScript脚本",
-        }
-        return type_map.get(ext, "未知类型")
+        return FILE_TYPE_MAP.get(ext, "未知类型")
 
     def _get_file_icon(self, ext: str) -> str:
         """获取文件图标"""
-        icon_map = {
-            ".py": "🐍",
-            ".md": "📝",
-            ".txt": "📄",
-            ".pdf": "📕",
-            ".doc": "📘",
-            ".docx": "📘",
-            ".xls": "📊",
-            ".xlsx": "📊",
-            ".jpg": "🖼️",
-            ".png": "🖼️",
-            ".gif": "🖼️",
-            ".zip": "🗜️",
-            ".json": "🗂️",
-            ".html": "🌐",
-            ".css": "🎨",
-            ".js": "⚡",
-            ".java": "☕",
-            ".cpp": "⚙️",
-            ".c": "⚙️",
-            ".go": "🐹",
-            ".rs": "🦀",
-        }
-        return icon_map.get(ext, "📄")
+        return FILE_ICON_MAP.get(ext, "📄")
 
-    def _write_statistics(self, md_file, stats: dict):
+    def _write_statistics(self, buf, stats: dict):
         """写入统计信息"""
-        md_file.write("\n\n## 📈 统计信息\n\n")
-        md_file.write(f"- **总目录数**: {stats['total_dirs']}\n")
-        md_file.write(f"- **总文件数**: {stats['total_files']}\n")
-        # md_file.write(f"- **文本文件**: {stats['text_files']}\n")
-        # md_file.write(f"- **转换文件**: {stats['converted_files']}\n")
-        # md_file.write(f"- **失败文件**: {stats['failed_files']}\n")
-        # md_file.write(f"- **忽略项目**: {stats['ignored_paths']}\n")
+        buf.write("\n\n## 📈 统计信息\n\n")
+        buf.write(f"- **总目录数**: {stats['total_dirs']}\n")
+        buf.write(f"- **总文件数**: {stats['total_files']}\n")
+        # buf.write(f"- **文本文件**: {stats['text_files']}\n")
+        # buf.write(f"- **转换文件**: {stats['converted_files']}\n")
+        # buf.write(f"- **失败文件**: {stats['failed_files']}\n")
+        # buf.write(f"- **忽略项目**: {stats['ignored_paths']}\n")
 
         # end_time = datetime.now()
         # duration = (end_time - stats["start_time"]).total_seconds()
-        # md_file.write(f"- **处理耗时**: {duration:.2f}秒\n")
-        # md_file.write(f"- **处理完成**: {end_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        # buf.write(f"- **处理耗时**: {duration:.2f}秒\n")
+        # buf.write(f"- **处理完成**: {end_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
 
     def _print_statistics(self, stats: dict, output_file: str):
         """打印统计信息"""
@@ -521,6 +971,7 @@ class DirectoryToMarkdown:
         print(f"  - 文本文件: {stats['text_files']}")
         print(f"  - 转换文件: {stats['converted_files']}")
         print(f"  - 失败文件: {stats['failed_files']}")
+        print(f"  - 跳过大文件: {stats['skipped_large']}")
         print(f"  - 忽略项目: {stats['ignored_paths']}")
 
         duration = (datetime.now() - stats["start_time"]).total_seconds()
@@ -0,0 +1,27 @@
+import argparse
+
+import pytest
+
+from file_concatenator.cli import _parse_size
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("2048", 2048),
+        ("0", 0),
+        ("1.5k", 1536),
+        ("500K", 500 * 1024),
+        ("10MB", 10 * 1024**2),
+        (" 1g ", 1024**3),
+        ("64b", 64),
+    ],
+)
+def test_parse_size(value, expected):
+    assert _parse_size(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "   ", "B", "abc", "10X", "nan", "inf", "-1", "-1M"])
+def test_parse_size_rejects_invalid_values(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        _parse_size(value)
@@ -0,0 +1,237 @@
+import importlib.util
+import sys
+
+import pytest
+
+from file_concatenator import core
+from file_concatenator.core import DirectoryToMarkdown
+
+
+def _write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content.encode("utf-8") if isinstance(content, str) else content)
+
+
+def _convert(tmp_path, **kwargs):
+    """转换 tmp_path/src，返回生成的 Markdown 内容"""
+    output = tmp_path / "out.md"
+    processor = DirectoryToMarkdown(use_markitdown=False, **kwargs)
+    assert processor.process(str(tmp_path / "src"), str(output))
+    return output.read_text(encoding="utf-8")
+
+
+def _tree(markdown):
+    """取出目录结构代码块中的各行"""
+    block = markdown.split("## 📊 目录结构\n\n```\n", 1)[1].split("```\n", 1)[0]
+    return block.splitlines()
+
+
+def test_max_file_size_skips_large_files(tmp_path, capsys):
+    _write(tmp_path / "src" / "big.txt", "big content\n" * 10)
+    _write(tmp_path / "src" / "small.txt", "small\n")
+
+    markdown = _convert(tmp_path, max_file_size=20)
+
+    assert "big content" not in markdown
+    assert "*(文件过大，已跳过)*" in markdown
+    assert "```text\nsmall\n```" in markdown
+    assert "跳过大文件: 1" in capsys.readouterr().out
+
+
+def test_max_file_size_keeps_files_at_the_limit(tmp_path):
+    _write(tmp_path / "src" / "exact.txt", "0123456789")
+
+    markdown = _convert(tmp_path, max_file_size=10)
+
+    assert "文件过大" not in markdown
+    assert "0123456789" in markdown
+
+
+def test_nested_gitignore_applies_to_its_directory_only(tmp_path):
+    _write(tmp_path / "src" / "sub" / ".gitignore", "*.tmp\n")
+    _write(tmp_path / "src" / "sub" / "a.tmp", "a")
+    _write(tmp_path / "src" / "sub" / "inner" / "b.tmp", "b")
+    _write(tmp_path / "src" / "sub" / "inner" / "keep.txt", "keep")
+    _write(tmp_path / "src" / "other" / "c.tmp", "c")
+    _write(tmp_path / "src" / "d.tmp", "d")
+
+    tree = "\n".join(_tree(_convert(tmp_path)))
+
+    assert "a.tmp" not in tree
+    assert "b.tmp" not in tree
+    assert "keep.txt" in tree
+    assert "c.tmp" in tree
+    assert "d.tmp" in tree
+
+
+def test_nested_gitignore_negation_reincludes_files(tmp_path):
+    _write(tmp_path / "src" / "sub" / ".gitignore", "*\n!*.py\n!.gitignore\n")
+    _write(tmp_path / "src" / "sub" / "a.py", "print('a')\n")
+    _write(tmp_path / "src" / "sub" / "b.txt", "b")
+    _write(tmp_path / "src" / "top.txt", "top")
+
+    tree = "\n".join(_tree(_convert(tmp_path)))
+
+    assert "a.py" in tree
+    assert ".gitignore" in tree
+    assert "b.txt" not in tree
+    assert "top.txt" in tree
+
+
+def test_nested_gitignore_directory_only_patterns(tmp_path):
+    _write(tmp_path / "src" / ".gitignore", "build/\n")
+    _write(tmp_path / "src" / "build" / "out.js", "out")
+    _write(tmp_path / "src" / "lib" / "build" / "deep.js", "deep")
+    _write(tmp_path / "src" / "docs" / "build", "a file, not a directory")
+
+    tree = "\n".join(_tree(_convert(tmp_path)))
+
+    assert "out.js" not in tree
+    assert "deep.js" not in tree
+    assert "docs/" in tree
+    assert "└── build" in tree
+
+
+def test_nested_gitignore_anchored_patterns(tmp_path):
+    _write(tmp_path / "src" / ".gitignore", "/dist\n")
+    _write(tmp_path / "src" / "dist" / "bundle.js", "bundle")
+    _write(tmp_path / "src" / "lib" / "dist" / "keep.js", "keep")
+    _write(tmp_path / "src" / "pkg" / ".gitignore", "docs/*.md\n")
+    _write(tmp_path / "src" / "pkg" / "docs" / "r.md", "readme")
+    _write(tmp_path / "src" / "pkg" / "docs" / "k.txt", "kept")
+    _write(tmp_path / "src" / "docs" / "top.md", "top")
+
+    tree = "\n".join(_tree(_convert(tmp_path)))
+
+    assert "bundle.js" not in tree
+    assert "keep.js" in tree
+    assert "r.md" not in tree
+    assert "k.txt" in tree
+    assert "top.md" in tree
+
+
+def test_nested_gitignore_can_be_disabled(tmp_path):
+    _write(tmp_path / "src" / "sub" / ".gitignore", "*.tmp\n")
+    _write(tmp_path / "src" / "sub" / "a.tmp", "a")
+
+    tree = "\n".join(_tree(_convert(tmp_path, use_gitignore=False)))
+
+    assert "a.tmp" in tree
+
+
+def test_nested_files_named_like_ignore_file_are_not_ignore_rules(tmp_path):
+    _write(tmp_path / "notes.txt", "*.log\n")
+    _write(tmp_path / "src" / "data" / "notes.txt", "*\n")
+    _write(tmp_path / "src" / "data" / "a.txt", "a")
+
+    tree = "\n".join(_tree(_convert(tmp_path, ignore_file=str(tmp_path / "notes.txt"))))
+
+    assert "data/" in tree
+    assert "a.txt" in tree
+
+
+@pytest.mark.parametrize(
+    ("chunks", "expected"),
+    [
+        (["a``", "``b"], 4),
+        (["``", "``", "``"], 6),
+        (["```a", "b``"], 3),
+        (["no", "ticks"], 0),
+    ],
+)
+def test_backtick_run_is_carried_across_chunks(chunks, expected):
+    processor = DirectoryToMarkdown(use_markitdown=False)
+    longest = carry = 0
+    for chunk in chunks:
+        chunk_longest, carry = processor._find_longest_backtick_sequence_in_chunk(chunk, carry)
+        longest = max(longest, chunk_longest)
+    assert longest == expected
+
+
+def test_streamed_file_separator_covers_backticks_split_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "STREAM_THRESHOLD", 16)
+    monkeypatch.setattr(core, "STREAM_CHUNK_SIZE", 8)
+    # 5 个连续反引号跨越第一个分块边界
+    content = "x" * 6 + "`" * 5 + "y" * 10
+    _write(tmp_path / "src" / "big.txt", content.replace("y", "y\r\n", 1))
+
+    markdown = _convert(tmp_path)
+
+    expected = content.replace("y", "y\n", 1)
+    assert f"``````text\n{expected}\n``````\n" in markdown
+
+
+def test_symlinked_directory_is_listed_but_not_descended(tmp_path):
+    _write(tmp_path / "target" / "inside.txt", "inside\n")
+    _write(tmp_path / "src" / "a.txt", "a\n")
+    try:
+        (tmp_path / "src" / "link").symlink_to(tmp_path / "target", target_is_directory=True)
+    except OSError:
+        pytest.skip("无法创建符号链接")
+
+    markdown = _convert(tmp_path)
+
+    assert _tree(markdown) == ["├── a.txt", "└── link/"]
+    assert "inside" not in markdown
+    assert "📂 目录: link" not in markdown
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_nul_byte_in_file_head_is_reported_as_binary(tmp_path, monkeypatch, streamed):
+    if streamed:
+        monkeypatch.setattr(core, "STREAM_THRESHOLD", 16)
+        monkeypatch.setattr(core, "STREAM_CHUNK_SIZE", 8)
+    _write(tmp_path / "src" / "data.dat", b"ab\x00" + b"visible text " * 4)
+
+    markdown = _convert(tmp_path)
+
+    assert "*(二进制文件，内容无法直接显示)*" in markdown
+    assert "visible text" not in markdown
+
+
+def test_nul_byte_after_binary_sniff_size_is_still_text(tmp_path):
+    _write(tmp_path / "src" / "data.dat", b"a" * core.BINARY_SNIFF_SIZE + b"\x00tail\n")
+
+    markdown = _convert(tmp_path)
+
+    assert "二进制文件" not in markdown
+    assert "\x00tail\n```" in markdown
+
+
+@pytest.mark.parametrize("streamed", [False, True])
+def test_utf8_bom_is_stripped(tmp_path, monkeypatch, streamed):
+    if streamed:
+        monkeypatch.setattr(core, "STREAM_THRESHOLD", 16)
+        monkeypatch.setattr(core, "STREAM_CHUNK_SIZE", 8)
+    content = "第一行 hello\n" * 4
+    _write(tmp_path / "src" / "bom.txt", b"\xef\xbb\xbf" + content.encode("utf-8"))
+
+    markdown = _convert(tmp_path)
+
+    assert "\ufeff" not in markdown
+    assert f"```text\n{content}```" in markdown
+
+
+def test_failed_markitdown_import_falls_back_to_text(tmp_path, monkeypatch, capsys):
+    real_find_spec = importlib.util.find_spec
+    monkeypatch.setattr(
+        importlib.util, "find_spec", lambda name, *args: object() if name == "markitdown" else real_find_spec(name, *args)
+    )
+    # sys.modules 中为 None 时 import 抛出 ImportError
+    monkeypatch.setitem(sys.modules, "markitdown", None)
+    _write(tmp_path / "src" / "icon.svg", "<svg></svg>\n")
+    _write(tmp_path / "src" / "logo.svg", "<svg/>\n")
+    output = tmp_path / "out.md"
+
+    processor = DirectoryToMarkdown(use_markitdown=True)
+    assert processor.markitdown_available
+    assert processor.process(str(tmp_path / "src"), str(output))
+
+    markdown = output.read_text(encoding="utf-8")
+    assert "使用markitdown转换失败" not in markdown
+    assert "<svg></svg>\n```" in markdown
+    assert "<svg/>\n```" in markdown
+    assert not processor.markitdown_available
+    out = capsys.readouterr().out
+    assert "转换文件: 0" in out
+    assert "失败文件: 0" in out